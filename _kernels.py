@@ -0,0 +1,28 @@
+"""
+Optional compiled kernels for hot per-cell array operations.
+
+Numba is not a hard dependency of the viewer; when it is missing, the
+numpy fallbacks below keep the same signatures and semantics.
+"""
+
+try:
+    from numba import njit, prange
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+if HAVE_NUMBA:
+
+    @njit(parallel=True, cache=True)
+    def fill_index(out, value):
+        """Fill a 1-D uint8 palette-index array in parallel."""
+        for i in prange(out.shape[0]):
+            out[i] = value
+
+else:
+
+    def fill_index(out, value):
+        """Fill a 1-D uint8 palette-index array."""
+        out[:] = value
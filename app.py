@@ -5,17 +5,22 @@ A modern, professional 3D CAD file visualization application using VTK and Trame
 Supports STL and STP file formats with interactive selection capabilities.
 """
 
+import asyncio
+import itertools
 import os
 import tempfile
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# VTK imports - order matters for factory initialization
-import vtkmodules.vtkRenderingOpenGL2  # noqa
-from vtkmodules.vtkInteractionStyle import vtkInteractorStyleSwitch  # noqa
+import numpy as np
+
 from vtkmodules.vtkIOGeometry import vtkSTLReader
 from vtkmodules.vtkFiltersSources import vtkCylinderSource
-from vtkmodules.vtkFiltersCore import vtkTriangleFilter
+from vtkmodules.vtkFiltersCore import (
+    vtkFeatureEdges,
+    vtkPolyDataNormals,
+    vtkQuadricDecimation,
+)
 from vtkmodules.vtkRenderingCore import (
     vtkActor,
     vtkPolyDataMapper,
@@ -24,20 +29,145 @@ from vtkmodules.vtkRenderingCore import (
     vtkRenderWindowInteractor,
     vtkLight,
     vtkCellPicker,
+    vtkProperty,
 )
-from vtkmodules.vtkCommonDataModel import vtkPolyData
-from vtkmodules.vtkCommonCore import vtkUnsignedCharArray
+from vtkmodules.vtkCommonCore import vtkLookupTable
+from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkStaticCellLocator
+from vtkmodules.util import numpy_support
+from vtkmodules.util.vtkConstants import VTK_UNSIGNED_CHAR
 
 from trame.app import get_server
-from trame.app.file_upload import ClientFile
 from trame.decorators import TrameApp, change
-from trame.ui.vuetify import SinglePageLayout
-from trame.widgets import vuetify, vtk as vtk_widgets, html
+
+from _kernels import fill_index
 
 # Color constants
 HIGHLIGHT_COLOR = (0.2, 0.9, 0.4)  # Bright green for selection
 DEFAULT_COLOR = (0.7, 0.75, 0.8)  # Light gray-blue
 
+# Cell colors are stored as one palette index per cell and mapped to
+# RGB by a shared lookup table on the GPU — a third of the bytes of an
+# RGB-per-cell array, and a selection flip writes a single byte
+DEFAULT_IDX = 0
+HIGHLIGHT_IDX = 1
+
+# Reject uploads larger than this before any parsing work happens
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024  # 512 MB
+
+# Meshes above this cell count get a decimated proxy for interaction
+LOD_THRESHOLD = 500_000
+LOD_TARGET_REDUCTION = 0.9
+
+# Scene mutations within this window share one render + view update
+RENDER_DEBOUNCE_S = 0.05
+
+# Click bursts within this window resolve as one pick
+CLICK_DEBOUNCE_S = 0.05
+
+
+# Shared placeholder geometry for STEP files, built on first use
+_STP_PLACEHOLDER = None
+
+# Default scene lights, built on first use and shared across renderers
+# (vtkLight is read-only during render, so instances can be reused)
+_DEFAULT_LIGHTS = None
+
+
+def _default_lights():
+    """Return the pre-configured key and fill lights for the scene."""
+    global _DEFAULT_LIGHTS
+    if _DEFAULT_LIGHTS is None:
+        key = vtkLight()
+        key.SetPosition(1, 1, 1)
+        key.SetFocalPoint(0, 0, 0)
+        key.SetColor(1, 1, 1)
+        key.SetIntensity(0.8)
+
+        fill = vtkLight()
+        fill.SetPosition(-1, -0.5, 0.5)
+        fill.SetFocalPoint(0, 0, 0)
+        fill.SetColor(0.8, 0.85, 1.0)
+        fill.SetIntensity(0.4)
+
+        _DEFAULT_LIGHTS = [key, fill]
+    return _DEFAULT_LIGHTS
+
+
+def _stp_placeholder():
+    """Return the placeholder polydata shown for STEP files.
+
+    The cylinder is generated once; callers ShallowCopy it so every
+    upload shares the point and cell arrays. It only advertises that
+    the STEP upload arrived, so a coarse 8-sided prism is plenty and
+    the mapper consumes the source's polys directly — no triangulation
+    pass needed.
+    """
+    global _STP_PLACEHOLDER
+    if _STP_PLACEHOLDER is None:
+        source = vtkCylinderSource()
+        source.SetRadius(25)
+        source.SetHeight(50)
+        source.SetResolution(8)
+        source.Update()
+
+        _STP_PLACEHOLDER = source.GetOutput()
+    return _STP_PLACEHOLDER
+
+
+def _create_render_window():
+    """Create the offscreen render window for the viewer.
+
+    On headless hosts the generic vtkRenderWindow factory can fall
+    back to a software GL context; preferring EGL keeps rendering
+    (and pick-time framebuffer reads) on the GPU. When EGL is not
+    compiled in, the factory default is used.
+    """
+    if "DISPLAY" not in os.environ:
+        try:
+            from vtkmodules.vtkRenderingOpenGL2 import vtkEGLRenderWindow
+
+            return vtkEGLRenderWindow()
+        except ImportError:
+            pass
+    return vtkRenderWindow()
+
+
+class _UploadAsPath:
+    """Expose uploaded bytes as a filesystem path for VTK readers.
+
+    On Linux the bytes go into an anonymous memfd, so the reader parses
+    straight from memory with no disk round-trip; elsewhere a named
+    temp file is used. A fixed reused path is deliberately avoided
+    because loads can run concurrently on the thread pool.
+
+    The buffer is consumed on construction and no reference to it is
+    kept (a @contextmanager would pin it through its retained args
+    tuple). That alone does not make the memfd copy the only resident
+    one: every frame on the way here — including any executor argument
+    tuple — must drop its binding too, which is why uploads travel to
+    the parse workers in a poppable container.
+    """
+
+    def __init__(self, file_content, suffix):
+        if hasattr(os, "memfd_create"):
+            self._fd = os.memfd_create("upload" + suffix)
+            os.write(self._fd, file_content)
+            self._path = f"/proc/self/fd/{self._fd}"
+        else:
+            self._fd = None
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                tmp.write(file_content)
+            self._path = tmp.name
+
+    def __enter__(self):
+        return self._path
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._fd is not None:
+            os.close(self._fd)
+        else:
+            os.unlink(self._path)
+
 
 @TrameApp()
 class CADViewerApp:
@@ -45,6 +175,10 @@ class CADViewerApp:
 
     def __init__(self, server=None):
         self.server = get_server(server, client_type="vue2")
+        # Workers for file parsing; VTK readers release the GIL, so
+        # parsing off the event loop keeps the server responsive.
+        self.executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        self._id_counter = itertools.count(1)
         self._setup_state()
         self._setup_vtk()
         self.ui = self._build_ui()
@@ -61,6 +195,10 @@ class CADViewerApp:
         """Initialize application state."""
         self.state.trame__title = "3D CAD Viewer"
         self.state.drawer_open = True
+        # Authoritative file-info store, keyed by file id for O(1)
+        # removal; state.loaded_files is a list view materialized from
+        # it whenever it changes
+        self._loaded_files_map = {}
         self.state.loaded_files = []
         self.state.selected_file = None
         self.state.selected_cell_id = -1
@@ -73,10 +211,27 @@ class CADViewerApp:
 
     def _setup_vtk(self):
         """Initialize VTK rendering pipeline."""
+        # Deferred factory imports — order matters, and the OpenGL2
+        # module is the expensive one, so importing the rendering stack
+        # here keeps module import (tests, tooling) cheap
+        import vtkmodules.vtkRenderingOpenGL2  # noqa
+        from vtkmodules.vtkInteractionStyle import vtkInteractorStyleSwitch  # noqa
+
         self.actors = {}
+        self.actor_to_file = {}
+        self.edge_actors = {}
         self.mappers = {}
         self.polydata = {}
+        self.lod_polydata = {}
+        self.color_scalars = {}
+        self.color_arrays = {}
+        self.locators = {}
         self.file_info = {}
+        self.file_bounds = {}
+        self.scene_bounds = None
+        self._render_pending = False
+        self._pending_click = None
+        self._click_handle = None
         self.selection = {
             "file_id": None,
             "cell_id": -1,
@@ -90,101 +245,255 @@ class CADViewerApp:
         self.renderer.GradientBackgroundOn()
         self.renderer.SetAmbient(0.3, 0.3, 0.3)
 
-        # Create lights
-        light = vtkLight()
-        light.SetPosition(1, 1, 1)
-        light.SetFocalPoint(0, 0, 0)
-        light.SetColor(1, 1, 1)
-        light.SetIntensity(0.8)
-        self.renderer.AddLight(light)
-
-        light2 = vtkLight()
-        light2.SetPosition(-1, -0.5, 0.5)
-        light2.SetFocalPoint(0, 0, 0)
-        light2.SetColor(0.8, 0.85, 1.0)
-        light2.SetIntensity(0.4)
-        self.renderer.AddLight(light2)
-
-        self.render_window = vtkRenderWindow()
+        # Attach the shared default lights
+        for light in _default_lights():
+            self.renderer.AddLight(light)
+
+        self.render_window = _create_render_window()
         self.render_window.AddRenderer(self.renderer)
         self.render_window.OffScreenRenderingOn()
         self.render_window.SetSize(1200, 800)
 
+        # Single-sample framebuffer + FXAA: the MSAA resolve is pure
+        # bandwidth waste for streamed frames, and FXAA is visually
+        # equivalent for CAD edges at a fraction of the cost
+        self.render_window.SetMultiSamples(0)
+        self.renderer.UseFXAAOn()
+
         self.interactor = vtkRenderWindowInteractor()
         self.interactor.SetRenderWindow(self.render_window)
         self.interactor.GetInteractorStyle().SetCurrentStyleToTrackballCamera()
 
-        # Cell picker for selection
+        # Swap large meshes for their decimated proxies while the
+        # camera is moving, restore full resolution on release
+        style = self.interactor.GetInteractorStyle().GetCurrentStyle()
+        style.AddObserver("StartInteractionEvent", self._on_interaction_start)
+        style.AddObserver("EndInteractionEvent", self._on_interaction_end)
+
+        # Surface property template, configured once and copied onto
+        # each file's actor (copied, not shared, because wireframe
+        # toggling mutates per-actor state)
+        self.default_property = vtkProperty()
+        self.default_property.SetSpecular(0.4)
+        self.default_property.SetSpecularPower(30)
+        self.default_property.SetAmbient(0.2)
+        self.default_property.SetDiffuse(0.8)
+        self.default_property.SetInterpolationToPhong()
+
+        # Shared palette for the per-cell color indices
+        self.color_lut = vtkLookupTable()
+        self.color_lut.SetNumberOfTableValues(2)
+        self.color_lut.SetTableRange(0, 1)
+        self.color_lut.SetTableValue(DEFAULT_IDX, *DEFAULT_COLOR, 1.0)
+        self.color_lut.SetTableValue(HIGHLIGHT_IDX, *HIGHLIGHT_COLOR, 1.0)
+        self.color_lut.Build()
+
+        # Cell picker for selection. Per-file cell locators (built in
+        # add_file) accelerate the ray-cell intersection so a pick does
+        # not scan every triangle in the scene.
         self.picker = vtkCellPicker()
         self.picker.SetTolerance(0.005)
 
         # Initial render
         self.render_window.Render()
 
+    def request_render(self):
+        """Coalesce render and view-update requests into one flush.
+
+        A burst of scene mutations (multi-file upload, clear_all, a
+        selection change plus camera reset) produces a single server
+        render and a single remote view transmission instead of one
+        per call site.
+        """
+        if self._render_pending:
+            return
+        self._render_pending = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop yet (startup) — flush synchronously
+            self._flush_render()
+            return
+        loop.call_later(RENDER_DEBOUNCE_S, self._flush_render)
+
+    def _flush_render(self):
+        self._render_pending = False
+        self.render_window.Render()
+        if hasattr(self.ctrl, 'view_update') and self.ctrl.view_update:
+            # Running from the debounce timer means no RPC will flush
+            # after us; without this the scene state pushed by
+            # view_update never reaches clients that (re)connect later
+            with self.state:
+                self.ctrl.view_update()
+
+    def _on_interaction_start(self, obj, event):
+        """Degrade render quality while the camera moves."""
+        # Allow VTK to drop to coarser rendering to hold ~20 fps
+        self.render_window.SetDesiredUpdateRate(20.0)
+        for file_id, lod in self.lod_polydata.items():
+            self.mappers[file_id].SetInputData(lod)
+
+    def _on_interaction_end(self, obj, event):
+        """Restore full quality and push one final frame on release."""
+        self.render_window.SetDesiredUpdateRate(0.0001)
+        for file_id in self.lod_polydata:
+            self.mappers[file_id].SetInputData(self.polydata[file_id])
+        self.request_render()
+
+    def build_lod_polydata(self, polydata):
+        """Build a decimated interaction proxy for a large mesh."""
+        decimator = vtkQuadricDecimation()
+        decimator.SetInputData(polydata)
+        decimator.SetTargetReduction(LOD_TARGET_REDUCTION)
+        decimator.Update()
+
+        lod = decimator.GetOutput()
+        # The proxy needs its own (uniform) CellColors so the shared
+        # mapper still finds the scalar array it colors by
+        self.setup_cell_colors(lod)
+        return lod
+
+    def recompute_scene_bounds(self):
+        """Merge the cached per-file bounds into the scene bounds.
+
+        O(number of files), so camera resets never have VTK walk every
+        actor's triangles to rediscover the scene box.
+        """
+        if not self.file_bounds:
+            self.scene_bounds = None
+            return
+
+        bounds = np.array(list(self.file_bounds.values()))
+        self.scene_bounds = (
+            bounds[:, 0].min(),
+            bounds[:, 1].max(),
+            bounds[:, 2].min(),
+            bounds[:, 3].max(),
+            bounds[:, 4].min(),
+            bounds[:, 5].max(),
+        )
+
     def generate_file_id(self):
         """Generate a unique file ID."""
-        return f"file_{int(time.time() * 1000)}"
+        return f"file_{next(self._id_counter)}"
 
-    def load_stl_file(self, file_content):
-        """Load an STL file from bytes content."""
-        with tempfile.NamedTemporaryFile(suffix=".stl", delete=False) as tmp:
-            tmp.write(file_content)
-            tmp_path = tmp.name
+    def load_stl_file(self, path):
+        """Load an STL file from a filesystem path."""
+        reader = vtkSTLReader()
+        reader.SetFileName(path)
+        reader.Update()
 
-        try:
-            reader = vtkSTLReader()
-            reader.SetFileName(tmp_path)
-            reader.Update()
-
-            polydata = vtkPolyData()
-            polydata.DeepCopy(reader.GetOutput())
-            return polydata, "STL"
-        finally:
-            os.unlink(tmp_path)
+        # Take the reader output directly; its arrays are ref-counted
+        # by the polydata, so no DeepCopy is needed.
+        return reader.GetOutput(), "STL"
 
     def load_stp_file(self, file_content, filename):
         """Load a STEP file - placeholder implementation."""
-        # Fallback: Create a sample geometry for demonstration
-        source = vtkCylinderSource()
-        source.SetRadius(25)
-        source.SetHeight(50)
-        source.SetResolution(36)
-        source.Update()
+        # ShallowCopy the shared template: each upload gets its own
+        # polydata (and thus its own CellColors) while the point and
+        # cell arrays stay shared and uncopied
+        polydata = vtkPolyData()
+        polydata.ShallowCopy(_stp_placeholder())
+        return polydata, "STP"
 
-        triangulator = vtkTriangleFilter()
-        triangulator.SetInputConnection(source.GetOutputPort())
-        triangulator.Update()
+    def parse_file_content(self, filename, content_holder):
+        """Parse uploaded bytes into render-ready polydata.
 
-        polydata = vtkPolyData()
-        polydata.DeepCopy(triangulator.GetOutput())
+        Pure parsing plus per-mesh preparation (color scalars, point
+        normals) with no state/scene access, so it is safe to run on a
+        worker thread. Only AddActor/Render work is left for the event
+        loop.
 
-        self.state.status_message = (
-            "Note: STEP shown as placeholder. Full STEP support requires OpenCASCADE."
+        ``content_holder`` is a one-element list carrying the upload
+        bytes. The executor work item pins its argument tuple for the
+        whole call, so the bytes travel in a container this worker can
+        empty before parsing.
+        """
+        content = content_holder.pop()
+        ext = Path(filename).suffix.lower()
+
+        if ext == ".stl":
+            with _UploadAsPath(content, ".stl") as tmp_path:
+                # The upload buffer lives behind tmp_path now; drop the
+                # last binding so only the memfd copy stays resident
+                # while VTK parses
+                del content
+                polydata, file_type = self.load_stl_file(tmp_path)
+        elif ext in [".stp", ".step"]:
+            polydata, file_type = self.load_stp_file(content, filename)
+        else:
+            raise ValueError(f"Unsupported format: {ext}. Use .stl or .stp files.")
+
+        self.setup_cell_colors(polydata)
+        self.compute_point_normals(polydata)
+        return polydata, file_type
+
+    def compute_point_normals(self, polydata):
+        """Compute point normals once up front if the mesh has none.
+
+        Raw STL output has no normals, and Phong shading would
+        otherwise regenerate them on every mapper rebuild (i.e. every
+        selection color change).
+        """
+        if polydata.GetPointData().GetNormals() is not None:
+            return
+        normals = vtkPolyDataNormals()
+        normals.SetInputData(polydata)
+        normals.ComputePointNormalsOn()
+        normals.ComputeCellNormalsOff()
+        normals.SplittingOff()
+        normals.ConsistencyOn()
+        normals.Update()
+        polydata.GetPointData().SetNormals(
+            normals.GetOutput().GetPointData().GetNormals()
         )
-        return polydata, "STP"
 
     def setup_cell_colors(self, polydata):
-        """Initialize cell colors array for the polydata."""
+        """Initialize cell colors array for the polydata.
+
+        The buffer holds one palette index per cell (mapped to RGB by
+        the shared lookup table) and is built as a single vectorized
+        fill instead of one SetTuple call per cell, which dominates
+        load time on large meshes. Returns the VTK scalars and the
+        numpy array backing them so the caller can keep both alive
+        (and mutate the buffer in place later).
+        """
         num_cells = polydata.GetNumberOfCells()
 
-        colors = vtkUnsignedCharArray()
-        colors.SetNumberOfComponents(3)
-        colors.SetNumberOfTuples(num_cells)
-        colors.SetName("CellColors")
-
-        default_rgb = [int(c * 255) for c in DEFAULT_COLOR]
-        for i in range(num_cells):
-            colors.SetTuple(i, default_rgb)
+        color_array = np.empty(num_cells, dtype=np.uint8)
+        fill_index(color_array, DEFAULT_IDX)
 
+        colors = numpy_support.numpy_to_vtk(
+            color_array, deep=False, array_type=VTK_UNSIGNED_CHAR
+        )
+        colors.SetName("CellColors")
         polydata.GetCellData().SetScalars(colors)
-        return colors
+        return colors, color_array
 
     def add_file(self, polydata, filename, file_type):
         """Add a file's geometry to the scene."""
         file_id = self.generate_file_id()
 
-        # Setup cell colors
-        self.setup_cell_colors(polydata)
+        # Cell colors normally arrive pre-built from the parse worker;
+        # build them here only for polydata added outside that path
+        colors = polydata.GetCellData().GetArray("CellColors")
+        if colors is not None:
+            color_array = numpy_support.vtk_to_numpy(colors)
+        else:
+            colors, color_array = self.setup_cell_colors(polydata)
+
+        # Build a BVH over the cells once so picking is O(log N)
+        locator = vtkStaticCellLocator()
+        locator.SetDataSet(polydata)
+        locator.BuildLocator()
+        self.picker.AddLocator(locator)
+
+        # Decimated interaction proxy for very large meshes
+        lod = None
+        if polydata.GetNumberOfCells() > LOD_THRESHOLD:
+            lod = self.build_lod_polydata(polydata)
+
+        self.compute_point_normals(polydata)
 
         # Create mapper
         mapper = vtkPolyDataMapper()
@@ -192,20 +501,27 @@ class CADViewerApp:
         mapper.ScalarVisibilityOn()
         mapper.SetScalarModeToUseCellData()
         mapper.SelectColorArray("CellColors")
+        mapper.SetColorModeToMapScalars()
+        mapper.SetLookupTable(self.color_lut)
+        mapper.UseLookupTableScalarRangeOn()
 
         # Create actor
         actor = vtkActor()
         actor.SetMapper(mapper)
-        actor.GetProperty().SetSpecular(0.4)
-        actor.GetProperty().SetSpecularPower(30)
-        actor.GetProperty().SetAmbient(0.2)
-        actor.GetProperty().SetDiffuse(0.8)
-        actor.GetProperty().SetInterpolationToPhong()
+        actor.GetProperty().DeepCopy(self.default_property)
 
         # Store references
         self.actors[file_id] = actor
+        self.actor_to_file[id(actor)] = file_id
         self.mappers[file_id] = mapper
         self.polydata[file_id] = polydata
+        if lod is not None:
+            self.lod_polydata[file_id] = lod
+        self.color_scalars[file_id] = colors
+        self.color_arrays[file_id] = color_array
+        self.locators[file_id] = locator
+        self.file_bounds[file_id] = polydata.GetBounds()
+        self.recompute_scene_bounds()
         self.file_info[file_id] = {
             "filename": filename,
             "type": file_type,
@@ -213,10 +529,31 @@ class CADViewerApp:
             "num_points": polydata.GetNumberOfPoints(),
         }
 
-        # Add to renderer
+        # Pre-extract feature edges into a hidden secondary actor so
+        # highlighting a file is a visibility flip, not a per-toggle
+        # edge re-extraction and VBO rebuild
+        edges = vtkFeatureEdges()
+        edges.SetInputData(polydata)
+        edges.BoundaryEdgesOn()
+        edges.Update()
+
+        edge_mapper = vtkPolyDataMapper()
+        edge_mapper.SetInputData(edges.GetOutput())
+
+        edge_actor = vtkActor()
+        edge_actor.SetMapper(edge_mapper)
+        edge_actor.GetProperty().SetColor(0.3, 0.6, 1.0)
+        edge_actor.GetProperty().SetLineWidth(1.5)
+        edge_actor.SetVisibility(0)
+        edge_actor.PickableOff()
+        self.edge_actors[file_id] = edge_actor
+
+        # Add to renderer. The camera is deliberately left alone here:
+        # callers reset it once per batch, so a multi-file upload does
+        # not re-frame the scene after every file.
         self.renderer.AddActor(actor)
-        self.renderer.ResetCamera()
-        self.render_window.Render()
+        self.renderer.AddActor(edge_actor)
+        self.request_render()
 
         return file_id
 
@@ -229,52 +566,84 @@ class CADViewerApp:
         if self.selection["file_id"] == file_id:
             self.clear_selection()
 
-        # Remove actor from renderer
+        # Remove actors from renderer
         self.renderer.RemoveActor(self.actors[file_id])
+        self.renderer.RemoveActor(self.edge_actors[file_id])
 
         # Clean up references
+        self.actor_to_file.pop(id(self.actors[file_id]), None)
+        self.picker.RemoveLocator(self.locators[file_id])
         del self.actors[file_id]
+        del self.edge_actors[file_id]
         del self.mappers[file_id]
         del self.polydata[file_id]
+        self.lod_polydata.pop(file_id, None)
+        del self.color_scalars[file_id]
+        del self.color_arrays[file_id]
+        del self.locators[file_id]
+        del self.file_bounds[file_id]
         del self.file_info[file_id]
+        self.recompute_scene_bounds()
 
         return True
 
+    def clear_all_files(self):
+        """Remove every loaded file from the scene in one pass.
+
+        Dropping the renderer's prop collection wholesale avoids the
+        O(N^2) cost of removing actors one at a time.
+        """
+        self.clear_selection()
+        for locator in self.locators.values():
+            self.picker.RemoveLocator(locator)
+        self.renderer.RemoveAllViewProps()
+        self.actors.clear()
+        self.actor_to_file.clear()
+        self.edge_actors.clear()
+        self.mappers.clear()
+        self.polydata.clear()
+        self.lod_polydata.clear()
+        self.color_scalars.clear()
+        self.color_arrays.clear()
+        self.locators.clear()
+        self.file_info.clear()
+        self.file_bounds.clear()
+        self.scene_bounds = None
+
     def highlight_cell(self, file_id, cell_id):
         """Highlight a specific cell."""
         self.clear_selection()
 
-        polydata = self.polydata.get(file_id)
-        if not polydata:
+        color_array = self.color_arrays.get(file_id)
+        if color_array is None:
             return False
 
-        colors = polydata.GetCellData().GetScalars("CellColors")
-        if not colors or cell_id < 0 or cell_id >= colors.GetNumberOfTuples():
+        if cell_id < 0 or cell_id >= len(color_array):
             return False
 
-        # Store original color and selection info
+        # Store original palette index and selection info
         self.selection["file_id"] = file_id
         self.selection["cell_id"] = cell_id
-        self.selection["original_color"] = list(colors.GetTuple(cell_id))
+        self.selection["original_color"] = int(color_array[cell_id])
 
-        # Set highlight color
-        highlight_rgb = [int(c * 255) for c in HIGHLIGHT_COLOR]
-        colors.SetTuple(cell_id, highlight_rgb)
-        polydata.Modified()
+        # Set highlight index. Dirty only the scalar array — a full
+        # polydata.Modified() would force the mapper to rebuild every
+        # VBO for a one-byte change.
+        color_array[cell_id] = HIGHLIGHT_IDX
+        self.color_scalars[file_id].Modified()
 
         return True
 
     def clear_selection(self):
         """Clear the current selection."""
         if self.selection["file_id"] and self.selection["cell_id"] >= 0:
-            polydata = self.polydata.get(self.selection["file_id"])
-            if polydata and self.selection["original_color"]:
-                colors = polydata.GetCellData().GetScalars("CellColors")
-                if colors:
-                    colors.SetTuple(
-                        self.selection["cell_id"], self.selection["original_color"]
-                    )
-                    polydata.Modified()
+            file_id = self.selection["file_id"]
+            color_array = self.color_arrays.get(file_id)
+            if color_array is not None and self.selection["original_color"] is not None:
+                color_array[self.selection["cell_id"]] = self.selection[
+                    "original_color"
+                ]
+                self.color_scalars[file_id].Modified()
 
         self.selection["file_id"] = None
         self.selection["cell_id"] = -1
@@ -287,22 +656,41 @@ class CADViewerApp:
         actor = self.picker.GetActor()
 
         if cell_id >= 0 and actor:
-            for file_id, stored_actor in self.actors.items():
-                if stored_actor is actor:
-                    return file_id, cell_id
+            file_id = self.actor_to_file.get(id(actor))
+            if file_id is not None:
+                return file_id, cell_id
 
         return None, -1
 
+    def _process_pending_click(self):
+        """Resolve the most recent click of a debounced burst."""
+        self._click_handle = None
+        if self._pending_click is None:
+            return
+        x, y = self._pending_click
+        self._pending_click = None
+
+        file_id, cell_id = self.pick_cell(x, y)
+        if file_id and cell_id >= 0:
+            if self.highlight_cell(file_id, cell_id):
+                # This runs from a timer, not an RPC, so push the state
+                # changes explicitly — nothing flushes for us afterwards
+                with self.state:
+                    self.state.selected_cell_id = cell_id
+                    self.state.selected_file = file_id
+                    file_info = self.file_info.get(file_id, {})
+                    file_type = file_info.get("type", "")
+                    element_type = "triangle" if file_type == "STL" else "surface"
+                    self.state.status_message = (
+                        f"Selected {element_type} (Cell ID: {cell_id})"
+                    )
+                self.request_render()
+
     def set_file_highlight(self, file_id, highlight=True):
         """Toggle edge highlighting for a file."""
-        actor = self.actors.get(file_id)
-        if actor:
-            if highlight:
-                actor.GetProperty().SetEdgeVisibility(1)
-                actor.GetProperty().SetEdgeColor(0.3, 0.6, 1.0)
-                actor.GetProperty().SetLineWidth(1.5)
-            else:
-                actor.GetProperty().SetEdgeVisibility(0)
+        edge_actor = self.edge_actors.get(file_id)
+        if edge_actor:
+            edge_actor.SetVisibility(1 if highlight else 0)
 
     def toggle_wireframe(self, file_id):
         """Toggle wireframe display for a file."""
@@ -319,86 +707,150 @@ class CADViewerApp:
 
     def reset_camera(self):
         """Reset camera to fit all geometry."""
-        self.renderer.ResetCamera()
+        if self.scene_bounds is not None:
+            # Explicit bounds skip VTK's O(triangles) actor traversal
+            self.renderer.ResetCamera(self.scene_bounds)
+        else:
+            self.renderer.ResetCamera()
         camera = self.renderer.GetActiveCamera()
         camera.Zoom(0.9)
-        self.render_window.Render()
-
-    def process_file_content(self, filename, content):
-        """Process file content and add to scene."""
-        ext = Path(filename).suffix.lower()
+        self.request_render()
+
+    def register_parsed_file(self, filename, result):
+        """Attach one parse result to the scene.
+
+        ``result`` is either the (polydata, file_type) pair from
+        parse_file_content or the exception it raised. Returns the
+        file-info dict for ``state.loaded_files`` on success (the
+        caller batches the state update), or None.
+        """
+        if isinstance(result, ValueError):
+            self.state.error_message = str(result)
+            self.state.show_error = True
+            return None
+        if isinstance(result, Exception):
+            self.state.error_message = f"Error loading {filename}: {result}"
+            self.state.show_error = True
+            return None
 
-        try:
-            if ext == ".stl":
-                polydata, file_type = self.load_stl_file(content)
-            elif ext in [".stp", ".step"]:
-                polydata, file_type = self.load_stp_file(content, filename)
-            else:
-                self.state.error_message = f"Unsupported format: {ext}. Use .stl or .stp files."
-                self.state.show_error = True
-                return False
+        polydata, file_type = result
 
-            if polydata.GetNumberOfCells() == 0:
-                self.state.error_message = f"No geometry found in {filename}"
-                self.state.show_error = True
-                return False
+        if file_type == "STP":
+            self.state.status_message = (
+                "Note: STEP shown as placeholder. "
+                "Full STEP support requires OpenCASCADE."
+            )
 
-            # Add to scene
-            file_id = self.add_file(polydata, filename, file_type)
+        if polydata.GetNumberOfCells() == 0:
+            self.state.error_message = f"No geometry found in {filename}"
+            self.state.show_error = True
+            return None
 
-            # Update file list in state
-            file_info = {
-                "id": file_id,
-                "name": filename,
-                "type": file_type,
-                "cells": polydata.GetNumberOfCells(),
-                "points": polydata.GetNumberOfPoints(),
-            }
-            self.state.loaded_files = self.state.loaded_files + [file_info]
-            return True
+        file_id = self.add_file(polydata, filename, file_type)
 
-        except Exception as e:
-            self.state.error_message = f"Error loading {filename}: {str(e)}"
-            self.state.show_error = True
-            return False
+        return {
+            "id": file_id,
+            "name": filename,
+            "type": file_type,
+            "cells": polydata.GetNumberOfCells(),
+            "points": polydata.GetNumberOfPoints(),
+        }
 
     # State change handlers
     @change("file_exchange")
-    def on_file_exchange(self, file_exchange, **kwargs):
+    async def on_file_exchange(self, file_exchange, **kwargs):
         """Handle file upload from VFileInput."""
         if file_exchange is None:
             return
 
+        # VFileInput hands back one dict, or a list when multiple files
+        # are selected
+        exchanges = (
+            file_exchange if isinstance(file_exchange, list) else [file_exchange]
+        )
+
         try:
             self.state.is_loading = True
 
-            # Get file info from the exchange dict
-            file_name = file_exchange.get("name", "unknown")
-            file_content = file_exchange.get("content")
-
-            self.state.status_message = f"Loading {file_name}..."
-
-            # Content can be bytes or list of bytes
-            if isinstance(file_content, list):
-                content = b"".join(file_content)
-            else:
-                content = file_content
-
-            if self.process_file_content(file_name, content):
+            # Submit every parse to the thread pool up front — STL
+            # parsing releases the GIL, so N files load on min(N,
+            # cores) cores — then mutate the scene serially below.
+            loop = asyncio.get_running_loop()
+            names = []
+            parses = []
+            for exchange in exchanges:
+                file_name = exchange.get("name", "unknown")
+                file_content = exchange.get("content")
+
+                self.state.status_message = f"Loading {file_name}..."
+
+                # Content can be bytes or list of bytes
+                if isinstance(file_content, list):
+                    content = b"".join(file_content)
+                else:
+                    content = file_content
+
+                if len(content) > MAX_UPLOAD_BYTES:
+                    self.state.error_message = (
+                        f"{file_name} is too large "
+                        f"({len(content) // (1024 * 1024)} MB, "
+                        f"limit {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)"
+                    )
+                    self.state.show_error = True
+                    continue
+
+                names.append(file_name)
+                # Hand the bytes over in a one-element list: the
+                # executor work item would otherwise pin its argument
+                # tuple (and thus the buffer) for the whole parse
+                parses.append(
+                    loop.run_in_executor(
+                        self.executor, self.parse_file_content, file_name, [content]
+                    )
+                )
+                # The workers own the bytes now; drop every other
+                # reference (including the exchange dict's) so a large
+                # upload is not resident three times over
+                exchange["content"] = None
+                del file_content, content
+
+            results = await asyncio.gather(*parses, return_exceptions=True)
+
+            pending = []
+            for file_name, result in zip(names, results):
+                file_info = self.register_parsed_file(file_name, result)
+                if file_info is not None:
+                    pending.append(file_info)
+
+            # One list materialization and one serialization to the
+            # browser for the whole batch
+            if pending:
+                for info in pending:
+                    self._loaded_files_map[info["id"]] = info
+                with self.state:
+                    self.state.loaded_files = list(self._loaded_files_map.values())
+                    if len(pending) == 1:
+                        self.state.status_message = (
+                            f"Loaded {pending[0]['name']} successfully"
+                        )
+                    else:
+                        self.state.status_message = (
+                            f"Loaded {len(pending)} files successfully"
+                        )
                 self.reset_camera()
-                self.render_window.Render()
-                self.state.status_message = f"Loaded {file_name} successfully"
 
-            # Update view if available
-            if hasattr(self.ctrl, 'view_update') and self.ctrl.view_update:
-                self.ctrl.view_update()
+            self.request_render()
 
         except Exception as e:
             self.state.error_message = f"Error loading file: {str(e)}"
             self.state.show_error = True
         finally:
-            self.state.is_loading = False
-            self.state.file_exchange = None
+            # Batch the trailing updates into one flush; the
+            # file_exchange reset re-enters this handler but hits the
+            # None early-return immediately
+            with self.state:
+                self.state.is_loading = False
+                self.state.file_exchange = None
 
     # Controller methods
     def _setup_ctrl_methods(self):
@@ -407,11 +859,13 @@ class CADViewerApp:
         @self.ctrl.add("remove_file")
         def remove_file(file_id):
             if self.remove_file(file_id):
-                self.state.loaded_files = [f for f in self.state.loaded_files if f["id"] != file_id]
-                self.state.status_message = "File removed"
-                self.state.selected_cell_id = -1
+                self._loaded_files_map.pop(file_id, None)
+                with self.state:
+                    self.state.loaded_files = list(self._loaded_files_map.values())
+                    self.state.status_message = "File removed"
+                    self.state.selected_cell_id = -1
                 self.reset_camera()
-                self.ctrl.view_update()
+                self.request_render()
 
         @self.ctrl.add("select_file_in_tree")
         def select_file_in_tree(file_id):
@@ -419,54 +873,67 @@ class CADViewerApp:
                 self.set_file_highlight(fid, False)
             self.set_file_highlight(file_id, True)
             self.state.selected_file = file_id
-            self.ctrl.view_update()
+            self.request_render()
 
         @self.ctrl.add("toggle_wireframe")
         def toggle_wireframe(file_id):
             result = self.toggle_wireframe(file_id)
             if result is not None:
                 self.state.status_message = f"{'Wireframe' if result else 'Surface'} mode"
-                self.ctrl.view_update()
+                self.request_render()
 
         @self.ctrl.add("clear_all")
         def clear_all():
-            for file_id in list(self.actors.keys()):
-                self.remove_file(file_id)
+            self.clear_all_files()
+            self._loaded_files_map.clear()
             self.state.loaded_files = []
             self.state.selected_file = None
             self.state.selected_cell_id = -1
             self.state.status_message = "All files cleared"
-            self.ctrl.view_update()
+            self.request_render()
 
         @self.ctrl.add("reset_view")
         def reset_view():
             self.reset_camera()
             self.state.status_message = "View reset"
-            self.ctrl.view_update()
+            self.request_render()
 
         @self.ctrl.add("on_left_click")
         def on_left_click(event_data):
             if not event_data:
                 return
-            x = event_data.get("x", 0)
-            y = event_data.get("y", 0)
-            file_id, cell_id = self.pick_cell(x, y)
-            if file_id and cell_id >= 0:
-                if self.highlight_cell(file_id, cell_id):
-                    self.state.selected_cell_id = cell_id
-                    self.state.selected_file = file_id
-                    file_info = self.file_info.get(file_id, {})
-                    file_type = file_info.get("type", "")
-                    element_type = "triangle" if file_type == "STL" else "surface"
-                    self.state.status_message = f"Selected {element_type} (Cell ID: {cell_id})"
-                    self.ctrl.view_update()
+            # Trailing-edge debounce: a double-click or drag burst
+            # queues several RPCs, but only the last position matters
+            # for selection, so only that one pays for a pick
+            self._pending_click = (
+                event_data.get("x", 0),
+                event_data.get("y", 0),
+            )
+            if self._click_handle is not None:
+                self._click_handle.cancel()
+                self._click_handle = None
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._process_pending_click()
+                return
+            self._click_handle = loop.call_later(
+                CLICK_DEBOUNCE_S, self._process_pending_click
+            )
 
         @self.ctrl.add("on_right_click")
         def on_right_click(event_data):
             self.clear_selection()
             self.state.selected_cell_id = -1
             self.state.status_message = "Selection cleared"
-            self.ctrl.view_update()
+            self.request_render()
+
+        @self.ctrl.add("toggle_view_mode")
+        def toggle_view_mode():
+            mode = "remote" if self.state.viewMode == "local" else "local"
+            self.state.viewMode = mode
+            self.state.status_message = f"Rendering mode: {mode}"
+            self.request_render()
 
         @self.ctrl.add("toggle_help")
         def toggle_help():
@@ -474,6 +941,11 @@ class CADViewerApp:
 
     def _build_ui(self):
         """Build the application UI."""
+        # Deferred so importing this module does not pull in the whole
+        # trame widget stack
+        from trame.ui.vuetify import SinglePageLayout
+        from trame.widgets import vuetify, vtk as vtk_widgets, html
+
         self._setup_ctrl_methods()
 
         with SinglePageLayout(self.server) as layout:
@@ -498,6 +970,13 @@ class CADViewerApp:
                     style="max-width: 300px;",
                 )
 
+                # Flip between browser-side (local) and server-side
+                # (remote) rendering
+                with vuetify.VBtn(icon=True, click=self.ctrl.toggle_view_mode):
+                    vuetify.VIcon(
+                        "{{ viewMode === 'local' ? 'mdi-monitor' : 'mdi-cloud-outline' }}"
+                    )
+
                 with vuetify.VBtn(icon=True, click=self.ctrl.reset_view):
                     vuetify.VIcon("mdi-camera-retake-outline")
 
@@ -590,10 +1069,22 @@ class CADViewerApp:
                         html.Div("Left click: Select cell")
                         html.Div("Right click: Clear selection")
 
-            # Main content (3D View)
+            # Main content (3D View). Local mode renders the geometry
+            # with vtk.js in the browser, so camera moves and selection
+            # color flips do not round-trip a server frame encode;
+            # remote mode stays available as a fallback for scenes too
+            # large to ship to the client.
             with layout.content:
                 with vuetify.VContainer(fluid=True, classes="pa-0 fill-height"):
-                    view = vtk_widgets.VtkRemoteView(self.render_window)
+                    view = vtk_widgets.VtkRemoteLocalView(
+                        self.render_window,
+                        namespace="view",
+                        mode="local",
+                        # Remote mode: stream downscaled/lower-quality
+                        # frames during interaction, full quality at rest
+                        interactive_ratio=0.5,
+                        interactive_quality=60,
+                    )
                     self.ctrl.view_update = view.update
                     self.ctrl.view_reset_camera = view.reset_camera
 
@@ -653,9 +1144,7 @@ class CADViewerApp:
             self.state.selected_cell_id = -1
             self.state.status_message = "Selection cleared"
 
-        self.render_window.Render()
-        if hasattr(self.ctrl, 'view_update') and self.ctrl.view_update:
-            self.ctrl.view_update()
+        self.request_render()
 
 
 def main():
@@ -3,50 +3,118 @@
 Generate sample STL files for testing the 3D CAD Viewer.
 """
 
+import argparse
 import struct
-import math
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import bloscpack
+except ImportError:
+    bloscpack = None
+
+# 80-byte binary STL header, padded once at import
+_STL_HEADER = b"Binary STL generated for 3D CAD Viewer testing".ljust(80, b"\0")
+
+# Triangle-count field of the binary STL prelude
+_COUNT_STRUCT = struct.Struct("<I")
+
+# The 50-byte binary STL triangle record: normal, three vertices,
+# attribute byte count
+_TRI_DT = np.dtype(
+    [
+        ("normal", "<3f4"),
+        ("v1", "<3f4"),
+        ("v2", "<3f4"),
+        ("v3", "<3f4"),
+        ("attr", "<u2"),
+    ]
+)
+
+
+# Above this triangle count the body is filled through a memmap, so
+# large assemblies stream to disk without an in-memory duplicate
+_MEMMAP_MIN_TRIANGLES = 65536
+
+
+def _fill_records(records, normals, verts):
+    """Lay triangles out as STL records in the given array."""
+    records["normal"] = normals
+    records["v1"] = verts[:, 0]
+    records["v2"] = verts[:, 1]
+    records["v3"] = verts[:, 2]
+    records["attr"] = 0
+
 
+def write_binary_stl(filename, normals, verts):
+    """Write triangles to a binary STL file.
+
+    ``normals`` is an (N, 3) float32 array of face normals and
+    ``verts`` the matching (N, 3, 3) array of triangle vertices.
+    """
+    num = len(normals)
 
-def write_binary_stl(filename, triangles):
-    """Write triangles to a binary STL file."""
     with open(filename, "wb") as f:
         # Header (80 bytes)
-        header = b"Binary STL generated for 3D CAD Viewer testing" + b"\0" * 34
-        f.write(header[:80])
+        f.write(_STL_HEADER)
 
         # Number of triangles
-        f.write(struct.pack("<I", len(triangles)))
-
-        # Write each triangle
-        for normal, v1, v2, v3 in triangles:
-            # Normal vector
-            f.write(struct.pack("<fff", *normal))
-            # Vertices
-            f.write(struct.pack("<fff", *v1))
-            f.write(struct.pack("<fff", *v2))
-            f.write(struct.pack("<fff", *v3))
-            # Attribute byte count
-            f.write(struct.pack("<H", 0))
+        f.write(_COUNT_STRUCT.pack(num))
+
+        if num < _MEMMAP_MIN_TRIANGLES:
+            # Small mesh: one contiguous buffer write
+            records = np.empty(num, dtype=_TRI_DT)
+            _fill_records(records, normals, verts)
+            records.tofile(f)
+            return
+
+        # Pre-size the file so the records can be filled in place
+        f.truncate(84 + num * _TRI_DT.itemsize)
+
+    records = np.memmap(filename, dtype=_TRI_DT, mode="r+", offset=84, shape=(num,))
+    _fill_records(records, normals, verts)
+    records.flush()
+
+
+def write_compressed_stl(filename, normals, verts):
+    """Write the triangle records Bloscpack-compressed (.stl.blp).
+
+    The nearly repeating normal and coordinate patterns of a triangle
+    soup compress well under shuffle + lz4. Requires the optional
+    bloscpack dependency.
+    """
+    if bloscpack is None:
+        raise RuntimeError("bloscpack is not installed; cannot write compressed output")
+
+    records = np.empty(len(normals), dtype=_TRI_DT)
+    _fill_records(records, normals, verts)
+    bloscpack.pack_ndarray_to_file(
+        records,
+        filename,
+        blosc_args=bloscpack.BloscArgs(cname="lz4", clevel=3, shuffle=True),
+    )
 
 
 def create_cube(size=50, offset=(0, 0, 0)):
     """Create a cube geometry."""
-    triangles = []
     s = size / 2
-    ox, oy, oz = offset
-
-    # Define cube vertices
-    vertices = [
-        (-s + ox, -s + oy, -s + oz),  # 0
-        (s + ox, -s + oy, -s + oz),  # 1
-        (s + ox, s + oy, -s + oz),  # 2
-        (-s + ox, s + oy, -s + oz),  # 3
-        (-s + ox, -s + oy, s + oz),  # 4
-        (s + ox, -s + oy, s + oz),  # 5
-        (s + ox, s + oy, s + oz),  # 6
-        (-s + ox, s + oy, s + oz),  # 7
-    ]
+
+    # Define cube vertices (at the origin; offset is folded in at the
+    # end with one broadcast add)
+    vertices = np.array(
+        [
+            (-s, -s, -s),  # 0
+            (s, -s, -s),  # 1
+            (s, s, -s),  # 2
+            (-s, s, -s),  # 3
+            (-s, -s, s),  # 4
+            (s, -s, s),  # 5
+            (s, s, s),  # 6
+            (-s, s, s),  # 7
+        ]
+    )
 
     # Define faces (each face has 2 triangles)
     faces = [
@@ -64,185 +132,216 @@ def create_cube(size=50, offset=(0, 0, 0)):
         ((-1, 0, 0), [0, 3, 7], [0, 7, 4]),
     ]
 
-    for normal, tri1, tri2 in faces:
-        triangles.append(
-            (normal, vertices[tri1[0]], vertices[tri1[1]], vertices[tri1[2]])
-        )
-        triangles.append(
-            (normal, vertices[tri2[0]], vertices[tri2[1]], vertices[tri2[2]])
-        )
-
-    return triangles
+    # Each face contributes its normal twice and two index triples;
+    # one fancy-index gather expands the 8-entry vertex table into the
+    # 12 triangles without re-embedding any coordinates
+    normals = np.repeat(
+        np.array([normal for normal, _, _ in faces], dtype=np.float32), 2, axis=0
+    )
+    tri_indices = np.array(
+        [tri for _, tri1, tri2 in faces for tri in (tri1, tri2)]
+    )
+    verts = vertices[tri_indices] + np.asarray(offset)
+    return normals, verts.astype(np.float32)
 
 
 def create_sphere(radius=30, resolution=16, offset=(0, 0, 0)):
-    """Create a sphere geometry using icosphere subdivision."""
-    triangles = []
-    ox, oy, oz = offset
-
-    # Create UV sphere
-    for i in range(resolution):
-        lat0 = math.pi * (-0.5 + float(i) / resolution)
-        lat1 = math.pi * (-0.5 + float(i + 1) / resolution)
-        z0 = math.sin(lat0) * radius
-        z1 = math.sin(lat1) * radius
-        r0 = math.cos(lat0) * radius
-        r1 = math.cos(lat1) * radius
-
-        for j in range(resolution * 2):
-            lon0 = 2 * math.pi * float(j) / (resolution * 2)
-            lon1 = 2 * math.pi * float(j + 1) / (resolution * 2)
-
-            x00 = math.cos(lon0) * r0 + ox
-            y00 = math.sin(lon0) * r0 + oy
-            x01 = math.cos(lon1) * r0 + ox
-            y01 = math.sin(lon1) * r0 + oy
-            x10 = math.cos(lon0) * r1 + ox
-            y10 = math.sin(lon0) * r1 + oy
-            x11 = math.cos(lon1) * r1 + ox
-            y11 = math.sin(lon1) * r1 + oy
-
-            v0 = (x00, y00, z0 + oz)
-            v1 = (x01, y01, z0 + oz)
-            v2 = (x10, y10, z1 + oz)
-            v3 = (x11, y11, z1 + oz)
-
-            # Calculate normals (pointing outward)
-            def normalize(v):
-                length = math.sqrt(v[0] ** 2 + v[1] ** 2 + v[2] ** 2)
-                if length > 0:
-                    return (v[0] / length, v[1] / length, v[2] / length)
-                return (0, 0, 1)
-
-            n0 = normalize((v0[0] - ox, v0[1] - oy, v0[2] - oz))
-            n1 = normalize((v1[0] - ox, v1[1] - oy, v1[2] - oz))
-            n2 = normalize((v2[0] - ox, v2[1] - oy, v2[2] - oz))
-            n3 = normalize((v3[0] - ox, v3[1] - oy, v3[2] - oz))
-
-            # Average normal for face
-            def avg_normal(n1, n2, n3):
-                return normalize(
-                    (
-                        (n1[0] + n2[0] + n3[0]) / 3,
-                        (n1[1] + n2[1] + n3[1]) / 3,
-                        (n1[2] + n2[2] + n3[2]) / 3,
-                    )
-                )
-
-            if i != 0:
-                triangles.append((avg_normal(n0, n1, n2), v0, v1, v2))
-            if i != resolution - 1:
-                triangles.append((avg_normal(n1, n3, n2), v1, v3, v2))
-
-    return triangles
+    """Create a sphere geometry as a vectorized UV grid."""
+    res = resolution
+
+    # Vertex grid: one (x, y, z) per (latitude, longitude) pair
+    lat = np.pi * (-0.5 + np.arange(res + 1) / res)
+    lon = 2 * np.pi * np.arange(2 * res + 1) / (2 * res)
+
+    ring_r = radius * np.cos(lat)[:, None]
+    x = ring_r * np.cos(lon)[None, :]
+    y = ring_r * np.sin(lon)[None, :]
+    z = np.broadcast_to((radius * np.sin(lat))[:, None], x.shape)
+    grid = np.stack([x, y, z], axis=-1)
+
+    # Quad corners: current ring (0, 1) and next ring (2, 3). The
+    # grid is origin-centered, so the corners double as the outward
+    # normal directions (normalized triangle centroid — one sqrt per
+    # face, no per-vertex normalization)
+    v0, v1 = grid[:-1, :-1], grid[:-1, 1:]
+    v2, v3 = grid[1:, :-1], grid[1:, 1:]
+
+    # The "upper" triangle of a quad collapses on the south-pole ring
+    # and the "lower" one on the north-pole ring. Slice those rows off
+    # the inputs before any math, so the pole fans and the middle band
+    # come out of two straight-line builds with no degenerate
+    # triangles ever materialized or culled
+    na = v0[1:] + v1[1:] + v2[1:]
+    na *= 1.0 / np.linalg.norm(na, axis=-1, keepdims=True)
+    nb = v1[:-1] + v3[:-1] + v2[:-1]
+    nb *= 1.0 / np.linalg.norm(nb, axis=-1, keepdims=True)
+
+    verts_a = np.stack([v0[1:], v1[1:], v2[1:]], axis=2).reshape(-1, 3, 3)
+    verts_b = np.stack([v1[:-1], v3[:-1], v2[:-1]], axis=2).reshape(-1, 3, 3)
+
+    normals = np.concatenate([na.reshape(-1, 3), nb.reshape(-1, 3)])
+    verts = np.concatenate([verts_a, verts_b])
+    verts += np.asarray(offset)
+    return normals.astype(np.float32), verts.astype(np.float32)
 
 
 def create_cylinder(radius=20, height=60, resolution=32, offset=(0, 0, 0)):
     """Create a cylinder geometry."""
-    triangles = []
-    ox, oy, oz = offset
     h2 = height / 2
 
-    for i in range(resolution):
-        a0 = 2 * math.pi * i / resolution
-        a1 = 2 * math.pi * (i + 1) / resolution
+    # One shared angle table feeds the side wall and both caps
+    angles = 2 * np.pi * np.arange(resolution + 1) / resolution
+    c = np.cos(angles)
+    s = np.sin(angles)
+
+    # Rim points of the two z levels, split into leading (0) and
+    # trailing (1) slice edges
+    x = c * radius
+    y = s * radius
+    bot = np.stack([x, y, np.full_like(x, -h2)], axis=-1)
+    top = np.stack([x, y, np.full_like(x, h2)], axis=-1)
+    b0, b1 = bot[:-1], bot[1:]
+    t0, t1 = top[:-1], top[1:]
+
+    # Side wall: two triangles per slice sharing the averaged normal
+    zeros = np.zeros(resolution)
+    nav = np.stack([(c[:-1] + c[1:]) / 2, (s[:-1] + s[1:]) / 2, zeros], axis=-1)
+    side_verts = np.concatenate(
+        [np.stack([b0, b1, t0], axis=1), np.stack([b1, t1, t0], axis=1)]
+    )
 
-        x0 = math.cos(a0) * radius + ox
-        y0 = math.sin(a0) * radius + oy
-        x1 = math.cos(a1) * radius + ox
-        y1 = math.sin(a1) * radius + oy
+    # Caps: triangle fans around the two face centers
+    top_center = np.broadcast_to([0.0, 0.0, h2], t0.shape)
+    bot_center = np.broadcast_to([0.0, 0.0, -h2], b0.shape)
+    cap_top_verts = np.stack([top_center, t0, t1], axis=1)
+    cap_bot_verts = np.stack([bot_center, b1, b0], axis=1)
+    cap_top_normals = np.broadcast_to([0.0, 0.0, 1.0], nav.shape)
+    cap_bot_normals = np.broadcast_to([0.0, 0.0, -1.0], nav.shape)
 
-        # Side faces
-        v0 = (x0, y0, -h2 + oz)
-        v1 = (x1, y1, -h2 + oz)
-        v2 = (x0, y0, h2 + oz)
-        v3 = (x1, y1, h2 + oz)
+    normals = np.concatenate([nav, nav, cap_top_normals, cap_bot_normals])
+    verts = np.concatenate([side_verts, cap_top_verts, cap_bot_verts])
+    verts += np.asarray(offset)
+    return normals.astype(np.float32), verts.astype(np.float32)
 
-        n0 = (math.cos(a0), math.sin(a0), 0)
-        n1 = (math.cos(a1), math.sin(a1), 0)
-        nav = ((n0[0] + n1[0]) / 2, (n0[1] + n1[1]) / 2, 0)
 
-        triangles.append((nav, v0, v1, v2))
-        triangles.append((nav, v1, v3, v2))
+def create_pyramid(base=40, height=50, offset=(0, 0, 0)):
+    """Create a pyramid geometry."""
+    b = base / 2
+
+    # Base vertices
+    v0 = (-b, -b, 0)
+    v1 = (b, -b, 0)
+    v2 = (b, b, 0)
+    v3 = (-b, b, 0)
+    apex = (0, 0, height)
+
+    # Base (2 triangles) then side faces
+    verts = np.array(
+        [
+            (v0, v2, v1),
+            (v0, v3, v2),
+            (v0, v1, apex),
+            (v1, v2, apex),
+            (v2, v3, apex),
+            (v3, v0, apex),
+        ]
+    )
 
-        # Top cap
-        triangles.append(((0, 0, 1), (ox, oy, h2 + oz), v2, v3))
+    # Face normals for all triangles in one batched cross product,
+    # spelled out per component — np.cross pays generic-axis handling
+    # overhead that the fixed 3-wide case does not need
+    e1 = verts[:, 1] - verts[:, 0]
+    e2 = verts[:, 2] - verts[:, 0]
+    normals = np.empty_like(e1)
+    normals[:, 0] = e1[:, 1] * e2[:, 2] - e1[:, 2] * e2[:, 1]
+    normals[:, 1] = e1[:, 2] * e2[:, 0] - e1[:, 0] * e2[:, 2]
+    normals[:, 2] = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+    normals *= 1.0 / np.linalg.norm(normals, axis=1, keepdims=True)
 
-        # Bottom cap
-        triangles.append(((0, 0, -1), (ox, oy, -h2 + oz), v1, v0))
+    # Normals are translation-invariant; only the vertices move
+    verts += np.asarray(offset)
+    return normals.astype(np.float32), verts.astype(np.float32)
 
-    return triangles
 
+def _generate_sample(path, factory, *args):
+    """Build one shape and write it (runs in a worker process).
 
-def create_pyramid(base=40, height=50, offset=(0, 0, 0)):
-    """Create a pyramid geometry."""
-    triangles = []
-    ox, oy, oz = offset
-    b = base / 2
+    Passing the factory and its arguments instead of the finished
+    arrays keeps the submit cheap — nothing but the path and a few
+    scalars crosses the process boundary.
+    """
+    write_binary_stl(path, *factory(*args))
 
-    # Base vertices
-    v0 = (-b + ox, -b + oy, oz)
-    v1 = (b + ox, -b + oy, oz)
-    v2 = (b + ox, b + oy, oz)
-    v3 = (-b + ox, b + oy, oz)
-    apex = (ox, oy, height + oz)
-
-    # Base (2 triangles)
-    triangles.append(((0, 0, -1), v0, v2, v1))
-    triangles.append(((0, 0, -1), v0, v3, v2))
-
-    # Side faces
-    def calc_normal(v1, v2, v3):
-        ux, uy, uz = v2[0] - v1[0], v2[1] - v1[1], v2[2] - v1[2]
-        vx, vy, vz = v3[0] - v1[0], v3[1] - v1[1], v3[2] - v1[2]
-        nx = uy * vz - uz * vy
-        ny = uz * vx - ux * vz
-        nz = ux * vy - uy * vx
-        length = math.sqrt(nx * nx + ny * ny + nz * nz)
-        if length > 0:
-            return (nx / length, ny / length, nz / length)
-        return (0, 0, 1)
-
-    triangles.append((calc_normal(v0, v1, apex), v0, v1, apex))
-    triangles.append((calc_normal(v1, v2, apex), v1, v2, apex))
-    triangles.append((calc_normal(v2, v3, apex), v2, v3, apex))
-    triangles.append((calc_normal(v3, v0, apex), v3, v0, apex))
-
-    return triangles
-
-
-def main():
+
+def main(argv=None):
     """Generate sample STL files."""
+    parser = argparse.ArgumentParser(description="Generate sample STL files")
+    parser.add_argument(
+        "--compressed",
+        action="store_true",
+        help="also write a Bloscpack-compressed assembly (requires bloscpack)",
+    )
+    args = parser.parse_args(argv)
+
     samples_dir = os.path.dirname(os.path.abspath(__file__))
     samples_dir = os.path.join(samples_dir, "samples")
     os.makedirs(samples_dir, exist_ok=True)
 
     print("Generating sample STL files...")
 
-    # Create individual files
-    write_binary_stl(os.path.join(samples_dir, "cube.stl"), create_cube(50))
-    print("  - Created cube.stl (12 triangles)")
-
-    write_binary_stl(os.path.join(samples_dir, "sphere.stl"), create_sphere(30, 16))
-    print("  - Created sphere.stl (sphere geometry)")
-
-    write_binary_stl(
-        os.path.join(samples_dir, "cylinder.stl"), create_cylinder(20, 60, 32)
-    )
-    print("  - Created cylinder.stl (cylinder geometry)")
-
-    write_binary_stl(os.path.join(samples_dir, "pyramid.stl"), create_pyramid(40, 50))
-    print("  - Created pyramid.stl (6 triangles)")
+    # The individual files are independent, so generate them in worker
+    # processes while this process builds the combined assembly
+    jobs = [
+        ("cube.stl", "12 triangles", create_cube, (50,)),
+        ("sphere.stl", "sphere geometry", create_sphere, (30, 16)),
+        ("cylinder.stl", "cylinder geometry", create_cylinder, (20, 60, 32)),
+        ("pyramid.stl", "6 triangles", create_pyramid, (40, 50)),
+    ]
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [
+            (
+                name,
+                description,
+                executor.submit(
+                    _generate_sample,
+                    os.path.join(samples_dir, name),
+                    factory,
+                    *args,
+                ),
+            )
+            for name, description, factory, args in jobs
+        ]
+
+        # Create a combined assembly
+        parts = [
+            create_cube(30, (-50, 0, 0)),
+            create_sphere(20, 12, (50, 0, 0)),
+            create_cylinder(15, 40, 24, (0, 50, 0)),
+            create_pyramid(25, 35, (0, -50, 0)),
+        ]
+        assembly_normals = np.concatenate([normals for normals, _ in parts])
+        assembly_verts = np.concatenate([verts for _, verts in parts])
+
+        write_binary_stl(
+            os.path.join(samples_dir, "assembly.stl"), assembly_normals, assembly_verts
+        )
 
-    # Create a combined assembly
-    assembly = []
-    assembly.extend(create_cube(30, (-50, 0, 0)))
-    assembly.extend(create_sphere(20, 12, (50, 0, 0)))
-    assembly.extend(create_cylinder(15, 40, 24, (0, 50, 0)))
-    assembly.extend(create_pyramid(25, 35, (0, -50, 0)))
+        if args.compressed:
+            if bloscpack is None:
+                print("  ! bloscpack not installed, skipping compressed output")
+            else:
+                write_compressed_stl(
+                    os.path.join(samples_dir, "assembly.stl.blp"),
+                    assembly_normals,
+                    assembly_verts,
+                )
 
-    write_binary_stl(os.path.join(samples_dir, "assembly.stl"), assembly)
+        for name, description, future in futures:
+            future.result()
+            print(f"  - Created {name} ({description})")
     print("  - Created assembly.stl (combined geometry)")
+    if args.compressed and bloscpack is not None:
+        print("  - Created assembly.stl.blp (compressed)")
 
     print(f"\nSample files created in: {samples_dir}")
     print("\nYou can now open these files in the 3D CAD Viewer!")